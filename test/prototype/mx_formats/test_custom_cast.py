@@ -28,6 +28,7 @@ from torchao.prototype.mx_formats.custom_cast import (
     f6_e3m2_unpacked_to_f32,
     get_bits,
     pack_uint4,
+    triton_f4_soa_to_scaled_bf16,
     triton_f4_to_bf16,
     unpack_uint4,
 )
@@ -343,6 +344,20 @@ def test_fp4_triton_scaled_cast():
     assert torch.all(torch.eq(f32_ref, f32_triton))
 
 
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available")
+@pytest.mark.skipif(not has_triton(), reason="unsupported without triton")
+@pytest.mark.skipif(not TORCH_VERSION_AFTER_2_4, reason="requires PyTorch >= 2.4")
+def test_fp4_triton_soa_scaled_cast():
+    size = (8, 256)
+    orig_vals = torch.randn(size, dtype=torch.float, device="cuda") * 100
+    mxtensor = MXTensor.to_mx(orig_vals, block_size=32, elem_dtype=DTYPE_FP4)
+
+    f32_ref = mxtensor.to_dtype(torch.float)
+    f32_triton = triton_f4_soa_to_scaled_bf16(mxtensor.pack_soa(), 32)
+    f32_triton = f32_triton.reshape(size).to(torch.float)
+    assert torch.all(torch.eq(f32_ref, f32_triton))
+
+
 @pytest.mark.parametrize("dtype_name", (DTYPE_FP6_E2M3, DTYPE_FP6_E3M2))
 def test_fp6_values(dtype_name):
     """
@@ -196,6 +196,44 @@ def test_transpose(elem_dtype, fp4_triton):
     torch.testing.assert_close(tensor_mx_dq_t, tensor_mx_t_dq, atol=0, rtol=0)
 
 
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available")
+@pytest.mark.parametrize("elem_dtype", SUPPORTED_ELEM_DTYPES)
+@pytest.mark.parametrize("b_transposed", [False, True])
+def test_mm_triton(elem_dtype, b_transposed):
+    """
+    Verify that the fused triton MX matmul matches dequantize + matmul
+    """
+    if elem_dtype in (DTYPE_FP6_E2M3, DTYPE_FP6_E3M2):
+        pytest.skip("unsupported configuration")
+    if elem_dtype in (torch.float8_e4m3fn, torch.float8_e5m2):
+        if not IS_CUDA_GE_89:
+            # separate ifs because flake8 is outsmarting me
+            pytest.skip("CUDA capability >= 8.9 required for float8 in triton")
+
+    block_size = 32
+    a_hp = torch.randn(96, 256, device="cuda", dtype=torch.bfloat16)
+    a_mx = MXTensor.to_mx(a_hp, elem_dtype, block_size)
+    if b_transposed:
+        b_hp = torch.randn(160, 256, device="cuda", dtype=torch.bfloat16)
+        b_mx = MXTensor.to_mx(b_hp, elem_dtype, block_size).t()
+    else:
+        b_hp = torch.randn(256, 160, device="cuda", dtype=torch.bfloat16)
+        b_mx = MXTensor.to_mx(b_hp, elem_dtype, block_size)
+
+    use_triton_mx_mm_kernel = config.use_triton_mx_mm_kernel
+    try:
+        config.use_triton_mx_mm_kernel = False
+        c_ref = torch.mm(a_mx, b_mx)
+        config.use_triton_mx_mm_kernel = True
+        c = torch.mm(a_mx, b_mx)
+    finally:
+        config.use_triton_mx_mm_kernel = use_triton_mx_mm_kernel
+
+    assert c.shape == c_ref.shape
+    assert c.dtype == c_ref.dtype
+    assert compute_error(c_ref, c) >= 40.0
+
+
 @pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available")
 @pytest.mark.parametrize("elem_dtype", SUPPORTED_ELEM_DTYPES)
 def test_cast_autograd(elem_dtype):
@@ -214,6 +252,46 @@ def test_view(elem_dtype):
     block_size = 2
     x_mx = MXTensor.to_mx(x, elem_dtype, block_size)
     x_mx_2 = x_mx.view(2, 4)  # noqa: F841
+    x_mx_3 = x_mx.view(1, 2, 4)
+    assert x_mx_3.shape == x_mx.shape
+    assert x_mx_3._data is x_mx._data
+
+
+@pytest.mark.parametrize("elem_dtype", SUPPORTED_ELEM_DTYPES)
+@pytest.mark.parametrize("hp_dtype", [torch.float32, torch.bfloat16])
+def test_precompute_bf16_scale(elem_dtype, hp_dtype):
+    x = torch.randn(8, 16, dtype=hp_dtype)
+    block_size = 4
+    x_mx = MXTensor.to_mx(x, elem_dtype, block_size)
+    x_mx_s = MXTensor.to_mx(x, elem_dtype, block_size, precompute_bf16_scale=True)
+    assert x_mx._scale_bf16 is None
+    assert x_mx_s._scale_bf16.dtype == torch.bfloat16
+    torch.testing.assert_close(
+        x_mx.to_dtype(hp_dtype), x_mx_s.to_dtype(hp_dtype), atol=0, rtol=0
+    )
+
+    # the precomputed scale is shared by rewrapped tensors
+    x_mx_s_t = x_mx_s.t()
+    assert x_mx_s_t._scale_bf16 is x_mx_s._scale_bf16
+    torch.testing.assert_close(
+        x_mx.t().to_dtype(hp_dtype), x_mx_s_t.to_dtype(hp_dtype), atol=0, rtol=0
+    )
+
+
+def test_pack_soa():
+    x = torch.randn(4, 64)
+    block_size = 16
+    x_mx = MXTensor.to_mx(x, DTYPE_FP4, block_size)
+    x_soa = x_mx.pack_soa()
+    assert x_soa.shape == (x.numel() // block_size, 1 + block_size // 2)
+    torch.testing.assert_close(x_soa[:, 0], x_mx._scale_e8m0, atol=0, rtol=0)
+
+    x_mx_2 = MXTensor.from_soa(x_soa, block_size, x.dtype, x.shape)
+    assert x_mx_2.shape == x_mx.shape
+    torch.testing.assert_close(x_mx_2._data, x_mx._data, atol=0, rtol=0)
+    torch.testing.assert_close(
+        x_mx_2._scale_e8m0, x_mx._scale_e8m0, atol=0, rtol=0
+    )
 
 
 @pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available")
@@ -16,7 +16,11 @@ from torchao.quantization.prototype.qat.utils import (
     _choose_qparams_per_token_asymmetric,
     _fake_quantize_per_channel_group,
     _fake_quantize_per_token,
+    _fused_choose_qparams_and_fake_quantize_per_token,
     _GenericFakeQuantize,
+    _get_group_qparams_symmetric,
+    _get_groupwise_affine_qparams,
+    _make_fake_quantize_per_channel_group_fn,
 )
 from torchao.quantization.quant_primitives import (
     fake_quantize_affine,
@@ -99,6 +103,23 @@ class TestQAT(unittest.TestCase):
         )
         torch.testing.assert_close(out, out_ptq, atol=0, rtol=0)
 
+    @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
+    def test_fake_quantize_per_channel_group_int8_zero_points(self):
+        n_bit = 4
+        (qmin, qmax) = self._get_qmin_qmax(n_bit)
+        group_size = 128
+
+        torch.manual_seed(self.SEED)
+        x = torch.randn(100, 256)
+        (s, zp) = get_group_qparams_symmetric(x, n_bit, group_size)
+        out_int32 = _fake_quantize_per_channel_group(
+            x, s, zp.to(torch.int32), qmin, qmax, group_size,
+        )
+        out_int8 = _fake_quantize_per_channel_group(
+            x, s, zp.to(torch.int8), qmin, qmax, group_size,
+        )
+        torch.testing.assert_close(out_int32, out_int8, atol=0, rtol=0)
+
     @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
     def test_fake_quantize_per_token(self):
         (qmin, qmax) = self._get_qmin_qmax(8)
@@ -122,6 +143,60 @@ class TestQAT(unittest.TestCase):
         )
         torch.testing.assert_close(out, out_ptq, atol=0, rtol=0)
 
+    @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
+    @unittest.skipIf(not _CUDA_IS_AVAILABLE, "skipping when cuda is not available")
+    def test_fused_choose_qparams_and_fake_quantize_per_token(self):
+        (qmin, qmax) = self._get_qmin_qmax(8)
+
+        torch.manual_seed(self.SEED)
+        for dtype in [torch.float32, torch.bfloat16]:
+            x = torch.randn(2, 100, 200, device="cuda", dtype=dtype).requires_grad_()
+            x2 = copy.deepcopy(x)
+            (s, zp) = _choose_qparams_per_token_asymmetric(x, torch.float32, torch.int32)
+            out = _fake_quantize_per_token(x, s, zp, qmin, qmax)
+            fused_out = _fused_choose_qparams_and_fake_quantize_per_token(x2, qmin, qmax)
+            torch.testing.assert_close(out, fused_out, atol=0, rtol=0)
+
+            out.sum().backward()
+            fused_out.sum().backward()
+            torch.testing.assert_close(x.grad, x2.grad, atol=0, rtol=0)
+
+    @unittest.skipIf(not _CUDA_IS_AVAILABLE, "skipping when cuda is not available")
+    def test_group_qparams_triton(self):
+        torch.manual_seed(self.SEED)
+        for dtype in [torch.float32, torch.bfloat16]:
+            for group_size in [32, 256]:
+                w = torch.randn(300, 512, device="cuda", dtype=dtype)
+                (s, zp) = _get_group_qparams_symmetric(w, 4, group_size, torch.float32)
+                (s_ref, zp_ref) = get_group_qparams_symmetric(w, 4, group_size, torch.float32)
+                torch.testing.assert_close(s, s_ref, atol=0, rtol=0)
+                torch.testing.assert_close(zp, zp_ref, atol=0, rtol=0)
+
+                (s, zp) = _get_groupwise_affine_qparams(w, 4, group_size, torch.bfloat16)
+                (s_ref, zp_ref) = get_groupwise_affine_qparams(w, 4, group_size, torch.bfloat16)
+                torch.testing.assert_close(s, s_ref, atol=0, rtol=0)
+                torch.testing.assert_close(zp, zp_ref, atol=0, rtol=0)
+
+    @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
+    @unittest.skipIf(not _CUDA_IS_AVAILABLE, "skipping when cuda is not available")
+    def test_fake_quantize_per_channel_group_specialized(self):
+        torch.manual_seed(self.SEED)
+        (qmin, qmax) = self._get_qmin_qmax(4)
+        for group_size in [32, 256]:
+            fn = _make_fake_quantize_per_channel_group_fn(qmin, qmax, group_size)
+            self.assertIs(fn, _make_fake_quantize_per_channel_group_fn(qmin, qmax, group_size))
+            x = torch.randn(100, 512, device="cuda").requires_grad_()
+            x2 = copy.deepcopy(x)
+            (s, zp) = get_group_qparams_symmetric(x, 4, group_size)
+            zp = zp.to(torch.int32)
+            out = _fake_quantize_per_channel_group(x, s, zp, qmin, qmax, group_size)
+            specialized_out = fn(x2, s, zp)
+            torch.testing.assert_close(out, specialized_out, atol=0, rtol=0)
+
+            out.sum().backward()
+            specialized_out.sum().backward()
+            torch.testing.assert_close(x.grad, x2.grad, atol=0, rtol=0)
+
     def _set_ptq_weight(
         self,
         ptq_linear: torch.nn.Module,
@@ -190,6 +265,23 @@ class TestQAT(unittest.TestCase):
         ptq_out = ptq_linear(x2)
         torch.testing.assert_close(ptq_out, qat_out, atol=0, rtol=0)
 
+    @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
+    def test_qat_8da4w_linear_weight_update(self):
+        from torchao.quantization.prototype.qat.api import Int8DynActInt4WeightQATLinear
+
+        torch.manual_seed(self.SEED)
+        qat_linear = Int8DynActInt4WeightQATLinear(256, 688, bias=False, groupsize=128)
+        x = torch.randn(100, 256)
+        qat_linear(x)
+
+        # Writes through `weight.data` do not bump the parameter's version,
+        # the weight qparams should still follow them
+        qat_linear.weight.data.mul_(2)
+        qat_out = qat_linear(x)
+        new_qat_linear = Int8DynActInt4WeightQATLinear(256, 688, bias=False, groupsize=128)
+        new_qat_linear.weight = qat_linear.weight
+        torch.testing.assert_close(new_qat_linear(x), qat_out, atol=0, rtol=0)
+
     @unittest.skipIf(not TORCH_VERSION_AFTER_2_4, "skipping when torch version is 2.4 or lower")
     def test_qat_8da4w_quantizer(self):
         from torchao.quantization.prototype.qat import Int8DynActInt4WeightQATQuantizer
@@ -1,2 +1,6 @@
 # If True, uses a custom triton kernel for fp4 dequantize
 use_fp4_custom_triton_dequant_kernel = False
+
+# If True, uses a fused triton kernel for MX matmuls, which dequantizes the
+# operands on the fly instead of materializing them in high precision
+use_triton_mx_mm_kernel = False
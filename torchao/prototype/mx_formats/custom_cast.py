@@ -19,6 +19,7 @@ if TORCH_VERSION_AFTER_2_4 and has_triton():
     from torch._inductor.runtime.triton_helpers import libdevice
 
 from torchao.prototype.mx_formats.constants import (
+    DTYPE_FP4,
     E8M0_EXPONENT_BIAS,
     E8M0_EXPONENT_NAN_VAL,
     F32_EXP_BIAS,
@@ -107,8 +108,8 @@ if has_triton():
     import triton.language as tl
 
     @triton.jit
-    def _fp4_packed_to_bf16(
-        x_packed,
+    def _fp4_unpacked_to_f32(
+        x,
         sign_mask_f4,
         mantissa_mask_f4,
         mbits_f4_e2m1,
@@ -121,16 +122,11 @@ if has_triton():
         zero_point_five_bits_f32,
     ):
         """
-        Input: a tensor of packed fp4 values
-        Output: a tensor of bfloat16 values
+        Input: a tensor of unpacked fp4 values, with bits 4-7 empty and
+          bits 0-3 in fp4_e2m1
+        Output: a tensor of float32 values
         """
 
-        # low-bits: original location 0:3
-        # high-bits: original location 4:7
-        x_low_bits = x_packed >> 4
-        x_high_bits = x_packed & 0xF
-        x = tl.interleave(x_low_bits, x_high_bits)
-
         # cast logic below
         # output = x_unpacked.to(tl.float32)
 
@@ -172,12 +168,52 @@ if has_triton():
         )
         result = result | sign_f32
 
-        # The bit shifting above is for float32, so for now we
+        output = result.to(tl.float32, bitcast=True)
+        return output
+
+    @triton.jit
+    def _fp4_packed_to_bf16(
+        x_packed,
+        sign_mask_f4,
+        mantissa_mask_f4,
+        mbits_f4_e2m1,
+        ebits_f4_e2m1,
+        f4_e2m1_exp_bias,
+        mbits_f32,
+        ebits_f32,
+        f32_exp_bias,
+        zero_bits_f32,
+        zero_point_five_bits_f32,
+    ):
+        """
+        Input: a tensor of packed fp4 values
+        Output: a tensor of bfloat16 values
+        """
+
+        # low-bits: original location 0:3
+        # high-bits: original location 4:7
+        x_low_bits = x_packed >> 4
+        x_high_bits = x_packed & 0xF
+        x = tl.interleave(x_low_bits, x_high_bits)
+
+        # The bit shifting is for float32, so for now we
         # bitcast to float32 and then regular cast to bfloat16
         # TODO(later): it should be pretty easy to cast directly to bf16, just
         # need to adjust the mbits/ebits/special values. Perf impact is likely
         # to be small as we would not be chaning memory access patterns.
-        output = result.to(tl.float32, bitcast=True)
+        output = _fp4_unpacked_to_f32(
+            x,
+            sign_mask_f4,
+            mantissa_mask_f4,
+            mbits_f4_e2m1,
+            ebits_f4_e2m1,
+            f4_e2m1_exp_bias,
+            mbits_f32,
+            ebits_f32,
+            f32_exp_bias,
+            zero_bits_f32,
+            zero_point_five_bits_f32,
+        )
         output = output.to(tl.bfloat16)
         return output
 
@@ -315,8 +351,263 @@ if has_triton():
 
         tl.store(output_ptr + offsets_out, output, mask=mask_out)
 
+    @triton.jit
+    def triton_f4_soa_to_scaled_bf16_kernel(
+        x_ptr,
+        output_ptr,
+        n_blocks,
+        mx_block_size: tl.constexpr,
+        sign_mask_f4: tl.constexpr,
+        mantissa_mask_f4: tl.constexpr,
+        mbits_f4_e2m1: tl.constexpr,
+        ebits_f4_e2m1: tl.constexpr,
+        f4_e2m1_exp_bias: tl.constexpr,
+        mbits_f32: tl.constexpr,
+        ebits_f32: tl.constexpr,
+        f32_exp_bias: tl.constexpr,
+        zero_bits_f32: tl.constexpr,
+        zero_point_five_bits_f32: tl.constexpr,
+        e8m0_exponent_bias: tl.constexpr,
+        e8m0_exponent_nan_val: tl.constexpr,
+        BLOCK_SIZE_B: tl.constexpr,
+    ):
+        pid = tl.program_id(axis=0)
+        offsets_b = pid * BLOCK_SIZE_B + tl.arange(0, BLOCK_SIZE_B)
+        mask_b = offsets_b < n_blocks
+
+        # each MX block is a row holding the scale followed by the packed
+        # elements, so both loads below hit the same cache lines
+        row_start = offsets_b * (1 + mx_block_size // 2)
+        s = tl.load(x_ptr + row_start, mask=mask_b)
+        offsets_in = (
+            row_start[:, None] + 1 + tl.arange(0, mx_block_size // 2)[None, :]
+        )
+        x_packed = tl.load(x_ptr + offsets_in, mask=mask_b[:, None])
+        output = _fp4_packed_to_bf16(
+            x_packed,
+            sign_mask_f4,
+            mantissa_mask_f4,
+            mbits_f4_e2m1,
+            ebits_f4_e2m1,
+            f4_e2m1_exp_bias,
+            mbits_f32,
+            ebits_f32,
+            f32_exp_bias,
+            zero_bits_f32,
+            zero_point_five_bits_f32,
+        )
+
+        # create the scale in bf16
+        s_offset = s.to(tl.int16) - e8m0_exponent_bias
+        s_fp = libdevice.pow(2.0, s_offset).to(tl.bfloat16)
+        s_fp = tl.where(s != e8m0_exponent_nan_val, s_fp, float("nan"))
+        output = output * s_fp[:, None]
+
+        offsets_out = (
+            offsets_b[:, None] * mx_block_size
+            + tl.arange(0, mx_block_size)[None, :]
+        )
+        tl.store(output_ptr + offsets_out, output, mask=mask_b[:, None])
+
+    @triton.jit
+    def _mx_tile_to_f32(
+        data_ptr,
+        s_ptr,
+        offsets_r,
+        offsets_c,
+        stride_r,
+        stride_c,
+        mask,
+        elem_kind: tl.constexpr,
+        mx_block_size: tl.constexpr,
+        sign_mask_f4: tl.constexpr,
+        mantissa_mask_f4: tl.constexpr,
+        mbits_f4_e2m1: tl.constexpr,
+        ebits_f4_e2m1: tl.constexpr,
+        f4_e2m1_exp_bias: tl.constexpr,
+        mbits_f32: tl.constexpr,
+        ebits_f32: tl.constexpr,
+        f32_exp_bias: tl.constexpr,
+        zero_bits_f32: tl.constexpr,
+        zero_point_five_bits_f32: tl.constexpr,
+        e8m0_exponent_nan_val: tl.constexpr,
+    ):
+        """
+        Input: pointers to the raw data and e8m0 scale of an MX tensor, and
+          the row and column offsets of a tile in the high precision tensor
+        Output: the scaled tile in float32
+        """
+        # offsets of the tile elements in the row-major memory layout of the
+        # high precision tensor, which is also the layout the scale applies to
+        offsets = offsets_r[:, None] * stride_r + offsets_c[None, :] * stride_c
+
+        if elem_kind == 2:
+            # fp4, two elements per byte, even elements in the high bits
+            # (see `pack_uint4`)
+            x_packed = tl.load(data_ptr + offsets // 2, mask=mask, other=0)
+            x = tl.where(offsets % 2 == 0, x_packed >> 4, x_packed & 0xF)
+            x = _fp4_unpacked_to_f32(
+                x,
+                sign_mask_f4,
+                mantissa_mask_f4,
+                mbits_f4_e2m1,
+                ebits_f4_e2m1,
+                f4_e2m1_exp_bias,
+                mbits_f32,
+                ebits_f32,
+                f32_exp_bias,
+                zero_bits_f32,
+                zero_point_five_bits_f32,
+            )
+        else:
+            # float8 data is passed in as uint8 bits
+            x_bits = tl.load(data_ptr + offsets, mask=mask, other=0)
+            if elem_kind == 0:
+                x = x_bits.to(tl.float8e4nv, bitcast=True).to(tl.float32)
+            else:
+                x = x_bits.to(tl.float8e5, bitcast=True).to(tl.float32)
+
+        # decode e8m0 by shifting the biased exponent into the float32
+        # exponent bits
+        s = tl.load(
+            s_ptr + offsets // mx_block_size, mask=mask, other=f32_exp_bias
+        )
+        s_fp = (s.to(tl.int32) << mbits_f32).to(tl.float32, bitcast=True)
+        s_fp = tl.where(s != e8m0_exponent_nan_val, s_fp, float("nan"))
+        return x * s_fp
+
+    @triton.autotune(
+        configs=[
+            triton.Config({"BLOCK_M": 32, "BLOCK_N": 32, "BLOCK_K": 32}),
+            triton.Config({"BLOCK_M": 64, "BLOCK_N": 64, "BLOCK_K": 32}),
+            triton.Config({"BLOCK_M": 128, "BLOCK_N": 64, "BLOCK_K": 32}),
+            triton.Config({"BLOCK_M": 64, "BLOCK_N": 128, "BLOCK_K": 32}),
+            triton.Config({"BLOCK_M": 128, "BLOCK_N": 128, "BLOCK_K": 64}),
+        ],
+        key=["M", "N", "K", "a_elem_kind", "b_elem_kind"],
+    )
+    @triton.jit
+    def triton_mx_mm_kernel(
+        a_ptr,
+        a_s_ptr,
+        b_ptr,
+        b_s_ptr,
+        output_ptr,
+        M,
+        N,
+        K,
+        stride_am,
+        stride_ak,
+        stride_bk,
+        stride_bn,
+        stride_om,
+        stride_on,
+        a_elem_kind: tl.constexpr,
+        b_elem_kind: tl.constexpr,
+        mx_block_size: tl.constexpr,
+        sign_mask_f4: tl.constexpr,
+        mantissa_mask_f4: tl.constexpr,
+        mbits_f4_e2m1: tl.constexpr,
+        ebits_f4_e2m1: tl.constexpr,
+        f4_e2m1_exp_bias: tl.constexpr,
+        mbits_f32: tl.constexpr,
+        ebits_f32: tl.constexpr,
+        f32_exp_bias: tl.constexpr,
+        zero_bits_f32: tl.constexpr,
+        zero_point_five_bits_f32: tl.constexpr,
+        e8m0_exponent_nan_val: tl.constexpr,
+        BLOCK_M: tl.constexpr,
+        BLOCK_N: tl.constexpr,
+        BLOCK_K: tl.constexpr,
+    ):
+        pid_m = tl.program_id(axis=0)
+        pid_n = tl.program_id(axis=1)
+        offsets_m = pid_m * BLOCK_M + tl.arange(0, BLOCK_M)
+        offsets_n = pid_n * BLOCK_N + tl.arange(0, BLOCK_N)
+        output_dtype = output_ptr.dtype.element_ty
+
+        acc = tl.zeros((BLOCK_M, BLOCK_N), dtype=tl.float32)
+        for k in range(0, tl.cdiv(K, BLOCK_K)):
+            offsets_k = k * BLOCK_K + tl.arange(0, BLOCK_K)
+            mask_a = (offsets_m[:, None] < M) & (offsets_k[None, :] < K)
+            mask_b = (offsets_k[:, None] < K) & (offsets_n[None, :] < N)
+            # dequantize both operands in registers instead of materializing
+            # them in high precision in memory
+            a = _mx_tile_to_f32(
+                a_ptr,
+                a_s_ptr,
+                offsets_m,
+                offsets_k,
+                stride_am,
+                stride_ak,
+                mask_a,
+                a_elem_kind,
+                mx_block_size,
+                sign_mask_f4,
+                mantissa_mask_f4,
+                mbits_f4_e2m1,
+                ebits_f4_e2m1,
+                f4_e2m1_exp_bias,
+                mbits_f32,
+                ebits_f32,
+                f32_exp_bias,
+                zero_bits_f32,
+                zero_point_five_bits_f32,
+                e8m0_exponent_nan_val,
+            )
+            b = _mx_tile_to_f32(
+                b_ptr,
+                b_s_ptr,
+                offsets_k,
+                offsets_n,
+                stride_bk,
+                stride_bn,
+                mask_b,
+                b_elem_kind,
+                mx_block_size,
+                sign_mask_f4,
+                mantissa_mask_f4,
+                mbits_f4_e2m1,
+                ebits_f4_e2m1,
+                f4_e2m1_exp_bias,
+                mbits_f32,
+                ebits_f32,
+                f32_exp_bias,
+                zero_bits_f32,
+                zero_point_five_bits_f32,
+                e8m0_exponent_nan_val,
+            )
+            acc += tl.dot(a.to(output_dtype), b.to(output_dtype))
+
+        offsets_out = (
+            offsets_m[:, None] * stride_om + offsets_n[None, :] * stride_on
+        )
+        mask_out = (offsets_m[:, None] < M) & (offsets_n[None, :] < N)
+        tl.store(output_ptr + offsets_out, acc.to(output_dtype), mask=mask_out)
+
 else:
 
+    def triton_f4_soa_to_scaled_bf16_kernel(
+        x_ptr,
+        output_ptr,
+        n_blocks,
+        mx_block_size,
+        sign_mask_f4,
+        mantissa_mask_f4,
+        mbits_f4_e2m1,
+        ebits_f4_e2m1,
+        f4_e2m1_exp_bias,
+        mbits_f32,
+        ebits_f32,
+        f32_exp_bias,
+        zero_bits_f32,
+        zero_point_five_bits_f32,
+        e8m0_exponent_bias,
+        e8m0_exponent_nan_val,
+        BLOCK_SIZE_B,
+    ):
+        raise AssertionError("unsupported without triton")
+
     def triton_f4_to_bf16_kernel(
         x_ptr,
         output_ptr,
@@ -357,6 +648,41 @@ else:
     ):
         raise AssertionError("unsupported without triton")
 
+    def triton_mx_mm_kernel(
+        a_ptr,
+        a_s_ptr,
+        b_ptr,
+        b_s_ptr,
+        output_ptr,
+        M,
+        N,
+        K,
+        stride_am,
+        stride_ak,
+        stride_bk,
+        stride_bn,
+        stride_om,
+        stride_on,
+        a_elem_kind,
+        b_elem_kind,
+        mx_block_size,
+        sign_mask_f4,
+        mantissa_mask_f4,
+        mbits_f4_e2m1,
+        ebits_f4_e2m1,
+        f4_e2m1_exp_bias,
+        mbits_f32,
+        ebits_f32,
+        f32_exp_bias,
+        zero_bits_f32,
+        zero_point_five_bits_f32,
+        e8m0_exponent_nan_val,
+        BLOCK_M,
+        BLOCK_N,
+        BLOCK_K,
+    ):
+        raise AssertionError("unsupported without triton")
+
 
 def triton_f4_to_bf16(x: torch.Tensor):
     """
@@ -434,6 +760,188 @@ def triton_f4_to_scaled_bf16(
     return output
 
 
+def triton_f4_soa_to_scaled_bf16(
+    x_soa: torch.Tensor,
+    mx_block_size: int,
+):
+    """
+    Input: fp4 MX data packed by `MXTensor.pack_soa`, of shape
+      (num_blocks, 1 + mx_block_size // 2), each row holding the e8m0 scale
+      of a block followed by its packed fp4 elements
+    Output: a tensor of bfloat16 values of shape (num_blocks, mx_block_size),
+      multiplied by the encoded scale
+    """
+    assert TORCH_VERSION_AFTER_2_4, "unsupported"
+    assert x_soa.dtype == torch.uint8
+    assert x_soa.is_contiguous()
+    assert x_soa.shape[1] == 1 + mx_block_size // 2
+    assert mx_block_size >= 4 and mx_block_size & (mx_block_size - 1) == 0
+    n_blocks = x_soa.shape[0]
+    output = torch.empty(
+        n_blocks, mx_block_size, device=x_soa.device, dtype=torch.bfloat16
+    )
+    assert x_soa.is_cuda and output.is_cuda
+    block_size_b = max(1, 1024 // mx_block_size)
+    grid = (triton.cdiv(n_blocks, block_size_b),)
+    triton_f4_soa_to_scaled_bf16_kernel[grid](
+        x_soa,
+        output,
+        n_blocks,
+        mx_block_size,
+        sign_mask_f4=SIGN_MASK_F4,
+        mantissa_mask_f4=MANTISSA_MASK_F4,
+        mbits_f4_e2m1=MBITS_F4_E2M1,
+        ebits_f4_e2m1=EBITS_F4_E2M1,
+        f4_e2m1_exp_bias=F4_E2M1_EXP_BIAS,
+        mbits_f32=MBITS_F32,
+        ebits_f32=EBITS_F32,
+        f32_exp_bias=F32_EXP_BIAS,
+        zero_bits_f32=ZERO_BITS_F32,
+        zero_point_five_bits_f32=ZERO_POINT_FIVE_BITS_F32,
+        e8m0_exponent_bias=E8M0_EXPONENT_BIAS,
+        e8m0_exponent_nan_val=E8M0_EXPONENT_NAN_VAL,
+        BLOCK_SIZE_B=block_size_b,
+    )
+    return output
+
+
+# element dtypes supported by `triton_mx_mm`, mapped to the `elem_kind`
+# constant used inside the kernel
+_TRITON_MX_MM_ELEM_KINDS = {
+    torch.float8_e4m3fn: 0,
+    torch.float8_e5m2: 1,
+    DTYPE_FP4: 2,
+}
+
+
+def _mx_hp_strides(data_lp: torch.Tensor, hp_shape):
+    # MX raw data is either row-major or the transpose of a row-major tensor,
+    # and the scale always applies to the row-major memory layout, so the
+    # element strides are derived from the high precision shape
+    if data_lp.is_contiguous():
+        return hp_shape[1], 1
+    assert data_lp.t().is_contiguous(), "unsupported"
+    return 1, hp_shape[0]
+
+
+def triton_mx_mm(
+    a_data: torch.Tensor,
+    a_s_e8m0: torch.Tensor,
+    a_elem_dtype,
+    a_shape,
+    b_data: torch.Tensor,
+    b_s_e8m0: torch.Tensor,
+    b_elem_dtype,
+    b_shape,
+    mx_block_size: int,
+    output_dtype: torch.dtype,
+):
+    """
+    Input: the raw data, e8m0 scale, element dtype and high precision shape
+      of two 2d MX tensors `a` and `b`, sharing the same block size
+    Output: `a @ b` in `output_dtype`, computed without materializing the high
+      precision versions of `a` and `b`
+
+    The kernel is launched through the `torchao::mx_mm` op, which has a meta
+    implementation, so that this can be traced by `torch.compile`.
+    """
+    assert output_dtype in (torch.bfloat16, torch.float16), "unsupported"
+    assert a_shape[1] == b_shape[0], f"{a_shape} and {b_shape} cannot be multiplied"
+    return torch.ops.torchao.mx_mm(
+        a_data,
+        a_s_e8m0,
+        _TRITON_MX_MM_ELEM_KINDS[a_elem_dtype],
+        list(a_shape),
+        b_data,
+        b_s_e8m0,
+        _TRITON_MX_MM_ELEM_KINDS[b_elem_dtype],
+        list(b_shape),
+        mx_block_size,
+        output_dtype,
+    )
+
+
+lib = torch.library.Library("torchao", "FRAGMENT")
+lib.define(
+    "mx_mm(Tensor a_data, Tensor a_s_e8m0, int a_elem_kind, SymInt[] a_shape, "
+    "Tensor b_data, Tensor b_s_e8m0, int b_elem_kind, SymInt[] b_shape, "
+    "int mx_block_size, ScalarType output_dtype) -> Tensor"
+)
+
+
+@torch.library.impl(lib, "mx_mm", "Meta")
+def mx_mm_meta(
+    a_data,
+    a_s_e8m0,
+    a_elem_kind,
+    a_shape,
+    b_data,
+    b_s_e8m0,
+    b_elem_kind,
+    b_shape,
+    mx_block_size,
+    output_dtype,
+):
+    return torch.empty(
+        (a_shape[0], b_shape[1]), device=a_data.device, dtype=output_dtype
+    )
+
+
+@torch.library.impl(lib, "mx_mm", "CUDA")
+def mx_mm_cuda(
+    a_data,
+    a_s_e8m0,
+    a_elem_kind,
+    a_shape,
+    b_data,
+    b_s_e8m0,
+    b_elem_kind,
+    b_shape,
+    mx_block_size,
+    output_dtype,
+):
+    M, K = a_shape
+    _, N = b_shape
+    stride_am, stride_ak = _mx_hp_strides(a_data, a_shape)
+    stride_bk, stride_bn = _mx_hp_strides(b_data, b_shape)
+    output = torch.empty(M, N, device=a_data.device, dtype=output_dtype)
+    grid = lambda meta: (  # noqa: E731
+        triton.cdiv(M, meta["BLOCK_M"]),
+        triton.cdiv(N, meta["BLOCK_N"]),
+    )
+    triton_mx_mm_kernel[grid](
+        a_data.view(torch.uint8),
+        a_s_e8m0,
+        b_data.view(torch.uint8),
+        b_s_e8m0,
+        output,
+        M,
+        N,
+        K,
+        stride_am,
+        stride_ak,
+        stride_bk,
+        stride_bn,
+        output.stride(0),
+        output.stride(1),
+        a_elem_kind=a_elem_kind,
+        b_elem_kind=b_elem_kind,
+        mx_block_size=mx_block_size,
+        sign_mask_f4=SIGN_MASK_F4,
+        mantissa_mask_f4=MANTISSA_MASK_F4,
+        mbits_f4_e2m1=MBITS_F4_E2M1,
+        ebits_f4_e2m1=EBITS_F4_E2M1,
+        f4_e2m1_exp_bias=F4_E2M1_EXP_BIAS,
+        mbits_f32=MBITS_F32,
+        ebits_f32=EBITS_F32,
+        f32_exp_bias=F32_EXP_BIAS,
+        zero_bits_f32=ZERO_BITS_F32,
+        zero_point_five_bits_f32=ZERO_POINT_FIVE_BITS_F32,
+        e8m0_exponent_nan_val=E8M0_EXPONENT_NAN_VAL,
+    )
+    return output
+
+
 # pack/unpack code copy-pasted from
 # https://github.com/pytorch-labs/ao/blob/main/torchao/dtypes/uint4.py
 
@@ -83,8 +83,12 @@ class MXInferenceLinear(torch.nn.Linear):
             new_mod = cls(**super_kwargs)
         # TODO(future PR): set to new_mod.weight directly, will need to work
         # through some errors
+        # the weight is dequantized on every forward, so decode its scale once
         new_mod.weight_mx = MXTensor.to_mx(
-            mod.weight.t().contiguous(), elem_dtype, block_size=block_size
+            mod.weight.t().contiguous(),
+            elem_dtype,
+            block_size=block_size,
+            precompute_bf16_scale=True,
         ).t()
         new_mod.bias = mod.bias
         new_mod.elem_dtype = elem_dtype
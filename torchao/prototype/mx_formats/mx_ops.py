@@ -17,12 +17,15 @@ then the ops in this file are used under the hood to properly route
 the underlying data fields to the MX matmul.
 """
 
+from types import MappingProxyType
 from typing import Any, Dict
 
 import torch
-from torch.utils._pytree import tree_map
+from torch.utils._triton import has_triton
 
+import torchao.prototype.mx_formats.config as config
 from torchao.prototype.mx_formats.constants import DTYPE_FP4
+from torchao.prototype.mx_formats.custom_cast import triton_mx_mm
 from torchao.prototype.mx_formats.mx_tensor import (  # noqa: E501
     MXTensor,
     tensor_size_hp_to_fp4x2,
@@ -47,22 +50,67 @@ def implements(aten_ops):
 @implements([aten.detach.default])
 def mx_desugar_op(aten_op, args, kwargs=None):
     old = args[0]
-    new_data = aten_op(old._data, *args[1:], **kwargs)
+    if aten_op is aten.detach.default:
+        # detach takes no other args, skip packing them
+        new_data = old._data.detach()
+    else:
+        new_data = aten_op(old._data, *args[1:], **kwargs)
     new = MXTensor(
         old._scale_e8m0,
         new_data,
         old._elem_dtype,
         old._block_size,
         old._orig_dtype,
+        old._scale_bf16,
     )
     return new
 
 
+def _is_row_or_col_major(t):
+    return t.is_contiguous() or t.t().is_contiguous()
+
+
+def _can_use_triton_mx_mm(a, b):
+    if not (config.use_triton_mx_mm_kernel and has_triton()):
+        return False
+    if a.dim() != 2 or b.dim() != 2:
+        return False
+    if not (a._data.is_cuda and b._data.is_cuda):
+        return False
+    if a._block_size != b._block_size or a._orig_dtype != b._orig_dtype:
+        return False
+    if a._orig_dtype not in (torch.bfloat16, torch.float16):
+        return False
+    if not (_is_row_or_col_major(a._data) and _is_row_or_col_major(b._data)):
+        return False
+    for elem_dtype in (a._elem_dtype, b._elem_dtype):
+        if elem_dtype in (torch.float8_e4m3fn, torch.float8_e5m2):
+            # float8 casts in triton require CUDA capability >= 8.9
+            if torch.cuda.get_device_capability(a._data.device) < (8, 9):
+                return False
+        elif elem_dtype != DTYPE_FP4:
+            return False
+    return True
+
+
 @implements([aten.mm.default, aten.matmul.default])
 def mx_mm(aten_op, args, kwargs=None):
     a = args[0]
     b = args[1]
     assert isinstance(a, MXTensor) and isinstance(b, MXTensor)
+    if _can_use_triton_mx_mm(a, b):
+        return triton_mx_mm(
+            a._data,
+            a._scale_e8m0,
+            a._elem_dtype,
+            a.shape,
+            b._data,
+            b._scale_e8m0,
+            b._elem_dtype,
+            b.shape,
+            a._block_size,
+            a._orig_dtype,
+        )
     a_hp = a.to_dtype(a._orig_dtype)
     b_hp = b.to_dtype(b._orig_dtype)
     res = aten_op(a_hp, b_hp)
@@ -85,12 +133,23 @@ def mx_addmm(aten_op, args, kwargs=None):
 def mx_t(aten_op, args, kwargs=None):
     # For now, only transpose(input, 0, 1) is supported.
     old = args[0]
+    if old._elem_dtype == DTYPE_FP4:
+        # The transpose only swaps strides, the packed fp4 bytes are never
+        # shuffled: `_scale_e8m0` applies to the row-major memory layout of
+        # `_data`, so physically moving nibbles around would break the
+        # scaling blocks. Consumers (`to_dtype`, the triton mm) read the
+        # transposed layout directly, which requires `_data` to be either
+        # row-major or the transpose of a row-major tensor.
+        assert (
+            old._data.is_contiguous() or old._data.t().is_contiguous()
+        ), "unsupported fp4 memory layout"
     new = MXTensor(
         old._scale_e8m0,
         old._data.t(),
         old._elem_dtype,
         old._block_size,
         old._orig_dtype,
+        old._scale_bf16,
     )
     return new
 
@@ -110,8 +169,9 @@ def mx_cast_up_op(aten_op, args, kwargs=None):
             return x.to_dtype(x._orig_dtype)
         return x
 
-    new_args = tree_map(unwrap, args)
-    new_kwargs = tree_map(unwrap, kwargs)
+    # the args are flat, so skip the overhead of pytree flattening
+    new_args = tuple(unwrap(x) for x in args)
+    new_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
     return aten_op(*new_args, **new_kwargs)
 
 
@@ -122,37 +182,52 @@ def mx_view_op(aten_op, args, kwargs=None):
     if args[0]._elem_dtype == DTYPE_FP4:
         # special case fp4 as we pack two elements per byte
         new_size = tensor_size_hp_to_fp4x2(new_size, data.is_contiguous())
-    new_data = aten_op(data, new_size, *args[2:], **kwargs)
+    if tuple(new_size) == tuple(data.shape):
+        # shape preserving view, reuse the raw data without dispatching
+        new_data = data
+    else:
+        new_data = aten_op(data, new_size, *args[2:], **kwargs)
     return MXTensor(
         args[0]._scale_e8m0,
         new_data,
         args[0]._elem_dtype,
         args[0]._block_size,
         args[0]._orig_dtype,
+        args[0]._scale_bf16,
     )
 
 
+_AUTOCAST_DTYPES = frozenset({torch.float16, torch.bfloat16})
+
+
 @implements([aten._to_copy.default])
 def autocast_to_copy(aten_op, args, kwargs=None):
     """This gets called when running matmul under autocast
     when the input is a MXTensor, presenting as a fp32
     tensor.
+
+    Note: even when the target dtype matches `_orig_dtype`, a new wrapper is
+    returned. `_to_copy` must not alias its input, and returning `args[0]`
+    would let autograd overwrite the history of the input tensor. Autocast
+    does not dispatch `_to_copy` when the dtype already matches.
     """
     assert isinstance(args[0], MXTensor)
-    # print('before', args[0], args[0].dtype, args[0]._orig_dtype)
+    assert kwargs.keys() == {"dtype"}, "Only support dtype kwarg for autocast"
+    dtype = kwargs["dtype"]
     assert (
-        len(kwargs) == 1 and "dtype" in kwargs
-    ), "Only support dtype kwarg for autocast"
-    assert kwargs["dtype"] in {
-        torch.float16,
-        torch.bfloat16,
-    }, "Only support floating point conversion for autocast w/ MXTensor"
+        dtype in _AUTOCAST_DTYPES
+    ), "Only support floating point conversion for autocast w/ MXTensor"
     res = MXTensor(
         args[0]._scale_e8m0,
         args[0]._data,
         args[0]._elem_dtype,
         args[0]._block_size,
-        kwargs["dtype"],
+        dtype,
+        args[0]._scale_bf16,
     )
-    # print('after', res, res.dtype, res._orig_dtype)
     return res
+
+
+# All ops are registered above. Freeze the table, since `MXTensor` caches the
+# lookups into it.
+MX_OPS_TABLE = MappingProxyType(dict(MX_OPS_TABLE))
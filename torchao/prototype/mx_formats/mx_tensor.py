@@ -16,7 +16,8 @@ Exponent E8M0 encoding details (OCP spec section 5.4.1):
   * Zeros: N/A
 """
 
-from typing import Dict, Union
+import functools
+from typing import Dict, Optional, Union
 
 import torch
 
@@ -192,7 +193,13 @@ def get_fp_scale(scale_e8m0):
     return s_fp
 
 
-def to_dtype(data_lp, scale_e8m0, elem_dtype, block_size, target_dtype):
+def to_dtype(
+    data_lp, scale_e8m0, elem_dtype, block_size, target_dtype, scale_bf16=None
+):
+    """
+    Dequantizes MX data to `target_dtype`. If `scale_bf16` (the output of
+    `get_bf16_scale`) is provided, it is used instead of decoding `scale_e8m0`.
+    """
     orig_shape = data_lp.shape
     is_transposed = not data_lp.is_contiguous()
     # if the underlying data is transposed, convert to row major before
@@ -235,7 +242,10 @@ def to_dtype(data_lp, scale_e8m0, elem_dtype, block_size, target_dtype):
         raise AssertionError("unsupported")
 
     data_hp = data_hp.reshape(-1, block_size)
-    s_fp = get_fp_scale(scale_e8m0).reshape(-1, 1).to(target_dtype)
+    if scale_bf16 is not None:
+        s_fp = scale_bf16.reshape(-1, 1).to(target_dtype)
+    else:
+        s_fp = get_fp_scale(scale_e8m0).reshape(-1, 1).to(target_dtype)
     data_hp = data_hp * s_fp
     data_hp = data_hp.reshape(orig_shape)
 
@@ -246,6 +256,15 @@ def to_dtype(data_lp, scale_e8m0, elem_dtype, block_size, target_dtype):
     return data_hp
 
 
+def get_bf16_scale(scale_e8m0):
+    """
+    Decodes the e8m0 scale to bfloat16. bfloat16 has the exponent range of
+    float32, so every e8m0 value (including NaN) is represented exactly and
+    dequantizing with this scale matches decoding `scale_e8m0` on the fly.
+    """
+    return get_fp_scale(scale_e8m0).to(torch.bfloat16)
+
+
 def tensor_size_hp_to_fp4x2(orig_size, is_contiguous):
     new_size = orig_size
     if is_contiguous:
@@ -264,6 +283,14 @@ def tensor_size_fp4x2_to_hp(orig_size, is_contiguous):
     return new_size
 
 
+@functools.lru_cache(maxsize=None)
+def _get_mx_op(func):
+    # avoid circular dependency
+    from torchao.prototype.mx_formats.mx_ops import MX_OPS_TABLE
+
+    return MX_OPS_TABLE.get(func)
+
+
 @torch._dynamo.allow_in_graph
 class ToMXConstrFunc(torch.autograd.Function):
     """
@@ -271,15 +298,23 @@ class ToMXConstrFunc(torch.autograd.Function):
     """
 
     @staticmethod
-    def forward(ctx, data_hp, elem_dtype, block_size):
+    def forward(ctx, data_hp, elem_dtype, block_size, precompute_bf16_scale):
         scale_e8m0_biased, data_lp = to_mx(data_hp, elem_dtype, block_size)
+        scale_bf16 = None
+        if precompute_bf16_scale:
+            scale_bf16 = get_bf16_scale(scale_e8m0_biased)
         return MXTensor(
-            scale_e8m0_biased, data_lp, elem_dtype, block_size, data_hp.dtype
+            scale_e8m0_biased,
+            data_lp,
+            elem_dtype,
+            block_size,
+            data_hp.dtype,
+            scale_bf16,
         )
 
     @staticmethod
     def backward(ctx, g):
-        return g, None, None
+        return g, None, None, None
 
 
 @torch._dynamo.allow_in_graph
@@ -296,6 +331,7 @@ class FromMXConstrFunc(torch.autograd.Function):
             tensor_lp._elem_dtype,
             tensor_lp._block_size,
             target_dtype,
+            tensor_lp._scale_bf16,
         )
 
     @staticmethod
@@ -304,6 +340,21 @@ class FromMXConstrFunc(torch.autograd.Function):
 
 
 class MXTensor(torch.Tensor):
+    """
+    Tensor subclass for the MX format, see the module docstring.
+
+    `_scale_e8m0` always stays in its packed uint8 e8m0 form (asserted
+    below). Ops which only change the view of `_data` (see `mx_ops.py`) must
+    pass the scale through to the new `MXTensor` as is, without copying,
+    upcasting or calling `.contiguous()` on it, so that all of them share a
+    single scale tensor.
+
+    Optionally, `_scale_bf16` holds the scale already decoded to bfloat16
+    (see `get_bf16_scale`), so that dequantizing a tensor which is used many
+    times does not decode the e8m0 scale every time. It is shared across
+    rewraps in the same way as `_scale_e8m0`.
+    """
+
     def __new__(
         cls,
         scale_e8m0_bits,
@@ -311,6 +362,7 @@ class MXTensor(torch.Tensor):
         elem_dtype,
         block_size,
         orig_dtype,
+        scale_bf16_bits: Optional[torch.Tensor] = None,
     ):
         new_size = data_bits.size()
         if elem_dtype == DTYPE_FP4:
@@ -327,6 +379,9 @@ class MXTensor(torch.Tensor):
         )
         assert scale_e8m0_bits.dtype == torch.uint8, "unsupported"
         assert len(scale_e8m0_bits.shape) == 1, "unsupported"
+        if scale_bf16_bits is not None:
+            assert scale_bf16_bits.dtype == torch.bfloat16, "unsupported"
+            assert scale_bf16_bits.shape == scale_e8m0_bits.shape, "unsupported"
         assert data_bits.dtype in (
             torch.float8_e4m3fn,
             torch.float8_e5m2,
@@ -361,6 +416,7 @@ class MXTensor(torch.Tensor):
         self._elem_dtype = elem_dtype
         self._block_size = block_size
         self._orig_dtype = orig_dtype
+        self._scale_bf16 = scale_bf16_bits
         return self
 
     def __repr__(self):
@@ -369,25 +425,55 @@ class MXTensor(torch.Tensor):
 
     @classmethod
     def __torch_dispatch__(cls, func, types, args, kwargs=None):
-        # avoid circular dependency
-        from torchao.prototype.mx_formats.mx_ops import MX_OPS_TABLE
-
-        if func in MX_OPS_TABLE:
-            return MX_OPS_TABLE[func](func, args, kwargs)
+        mx_op = _get_mx_op(func)
+        if mx_op is not None:
+            return mx_op(func, args, kwargs)
 
         raise NotImplementedError(f"{func} not implemented")
 
     def to_dtype(self, target_dtype):
         return FromMXConstrFunc.apply(self, target_dtype)
 
+    def pack_soa(self) -> torch.Tensor:
+        """
+        Packs an fp4 `MXTensor` into a single uint8 tensor of shape
+        (num_blocks, 1 + block_size // 2). Each row holds the e8m0 scale of
+        a block followed by its packed fp4 elements, so that a dequantize
+        kernel reads both from the same memory stream, see
+        `triton_f4_soa_to_scaled_bf16`. Use `from_soa` to convert back.
+        """
+        assert self._elem_dtype == DTYPE_FP4, "unsupported"
+        assert self._data.is_contiguous(), "unsupported"
+        data = self._data.reshape(-1, self._block_size // 2)
+        return torch.cat([self._scale_e8m0.reshape(-1, 1), data], dim=1)
+
+    @staticmethod
+    def from_soa(
+        data_soa: torch.Tensor,
+        block_size: int,
+        orig_dtype: torch.dtype,
+        shape,
+    ):
+        """
+        Inverse of `pack_soa`, `shape` is the high precision shape of the
+        original `MXTensor`.
+        """
+        assert data_soa.shape[1] == 1 + block_size // 2, "unsupported"
+        scale_e8m0 = data_soa[:, 0].contiguous()
+        data = data_soa[:, 1:].reshape(tensor_size_hp_to_fp4x2(shape, True))
+        return MXTensor(scale_e8m0, data, DTYPE_FP4, block_size, orig_dtype)
+
     @staticmethod
     @torch._dynamo.allow_in_graph
     def to_mx(
         data_hp: torch.Tensor,
         elem_dtype: Union[torch.dtype, str],
         block_size: int = BLOCK_SIZE_DEFAULT,
+        precompute_bf16_scale: bool = False,
     ):
-        return ToMXConstrFunc.apply(data_hp, elem_dtype, block_size)
+        return ToMXConstrFunc.apply(
+            data_hp, elem_dtype, block_size, precompute_bf16_scale
+        )
 
     def __tensor_flatten__(self):
         ctx = {
@@ -395,7 +481,10 @@ class MXTensor(torch.Tensor):
             "_block_size": self._block_size,
             "_orig_dtype": self._orig_dtype,
         }
-        return ["_scale_e8m0", "_data"], ctx
+        inner_tensors = ["_scale_e8m0", "_data"]
+        if self._scale_bf16 is not None:
+            inner_tensors.append("_scale_bf16")
+        return inner_tensors, ctx
 
     @staticmethod
     def __tensor_unflatten__(
@@ -410,6 +499,7 @@ class MXTensor(torch.Tensor):
             metadata["_elem_dtype"],
             metadata["_block_size"],
             metadata["_orig_dtype"],
+            inner_tensors.get("_scale_bf16"),
         )
 
     # Do not force the MXTensor type on the returned tensor
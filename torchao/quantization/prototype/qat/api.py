@@ -4,7 +4,7 @@
 # This source code is licensed under the license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
 import torch
 import torch.nn.functional as F
@@ -13,7 +13,6 @@ from torchao.quantization.GPTQ import (
     _check_linear_int4_k,
     _replace_linear_int4,
     _replace_linear_8da4w,
-    get_groupwise_affine_qparams,
     groupwise_affine_quantize_tensor,
     Int8DynActInt4WeightLinear,
     WeightOnlyInt4Linear,
@@ -22,12 +21,21 @@ from torchao.quantization.quant_primitives import ZeroPointDomain
 from torchao.quantization.unified import TwoStepQuantizer
 from torchao.quantization.utils import get_group_qparams_symmetric
 from .utils import (
+    _can_fuse_choose_qparams_and_fake_quantize_per_token,
     _choose_qparams_per_token_asymmetric,
     _fake_quantize_per_channel_group,
     _fake_quantize_per_token,
+    _fused_choose_qparams_and_fake_quantize_per_token,
+    _get_group_qparams_symmetric,
+    _get_groupwise_affine_qparams,
+    _make_fake_quantize_per_channel_group_fn,
 )
 
 
+# (qmin, qmax) for symmetric signed quantization, keyed by number of bits
+_QMIN_QMAX_SYM = {n: (-(1 << (n - 1)), (1 << (n - 1)) - 1) for n in range(2, 17)}
+
+
 # =================
 # |   8da4w QAT   |
 # =================
@@ -82,31 +90,49 @@ def _convert_qat_linear_8da4w(module: torch.nn.Module):
     """
     Replace all `Int8DynActInt4WeightQATLinear` with `Int8DynActInt4WeightLinear`.
     """
-    for name, child in module.named_children():
-        if isinstance(child, Int8DynActInt4WeightQATLinear):
-            quantized_linear = Int8DynActInt4WeightLinear(
-                child.in_features,
-                child.out_features,
-                bias=False,
-                groupsize=child.groupsize,
-                precision=child.precision,
-                scales_precision=child.scales_precision,
-            )
-            setattr(module, name, quantized_linear)
+    # Collect all QAT linears first, walking the module tree iteratively
+    to_convert = []
+    stack = [module]
+    while stack:
+        parent = stack.pop()
+        for name, child in parent.named_children():
+            if isinstance(child, Int8DynActInt4WeightQATLinear):
+                to_convert.append((parent, name, child))
+            else:
+                stack.append(child)
+
+    for (parent, name, child) in to_convert:
+        (q_weight, s, zp) = _quantize_qat_linear_8da4w_weight(child)
+        quantized_linear = Int8DynActInt4WeightLinear(
+            child.in_features,
+            child.out_features,
+            bias=False,
+            groupsize=child.groupsize,
+            precision=child.precision,
+            scales_precision=child.scales_precision,
+        )
+        setattr(parent, name, quantized_linear)
 
-            # Load weights and qparams into quantized linear
-            n_bit = 4
-            (qmin, qmax) = child._get_qmin_qmax(n_bit)
-            (s, zp) = get_group_qparams_symmetric(child.weight, n_bit, child.groupsize)
-            from torchao._executorch_ops import _quantized_decomposed_quantize_per_channel_group_wrapper
-            q_weight = _quantized_decomposed_quantize_per_channel_group_wrapper(
-                child.weight, s, zp, qmin, qmax, torch.int8, child.groupsize,
-            )
-            quantized_linear.weight = q_weight
-            quantized_linear.scales = s
-            quantized_linear.zeros = zp
-        else:
-            _convert_qat_linear_8da4w(child)
+        # Load weights and qparams into quantized linear
+        quantized_linear.weight = q_weight
+        quantized_linear.scales = s
+        quantized_linear.zeros = zp
+
+def _quantize_qat_linear_8da4w_weight(
+    child: "Int8DynActInt4WeightQATLinear",
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Return the int4 weight (stored in int8), scales and zero points for
+    converting `child` to `Int8DynActInt4WeightLinear`.
+    """
+    from torchao._executorch_ops import _quantized_decomposed_quantize_per_channel_group_wrapper
+    n_bit = 4
+    (qmin, qmax) = child._get_qmin_qmax(n_bit)
+    (s, zp) = get_group_qparams_symmetric(child.weight, n_bit, child.groupsize)
+    q_weight = _quantized_decomposed_quantize_per_channel_group_wrapper(
+        child.weight, s, zp, qmin, qmax, torch.int8, child.groupsize,
+    )
+    return (q_weight, s, zp)
 
 class Int8DynActInt4WeightQATLinear(torch.nn.Linear):
     """
@@ -144,7 +170,14 @@ class Int8DynActInt4WeightQATLinear(torch.nn.Linear):
         self.precision = precision
         self.scales_precision = scales_precision
         # TODO: make this configurable?
-        self.zero_points_precision = torch.int32
+        # int8 is enough for both the 8-bit activation and 4-bit weight zero
+        # points, and halves the zero point bytes compared to int32
+        self.zero_points_precision = torch.int8
+        self._act_qmin, self._act_qmax = self._get_qmin_qmax(8)
+        self._w_qmin, self._w_qmax = self._get_qmin_qmax(4)
+        self._weight_fake_quantize_fn = _make_fake_quantize_per_channel_group_fn(
+            self._w_qmin, self._w_qmax, groupsize,
+        )
         self._fake_quant_enabled = True
 
     def enable_fake_quant(self, enabled: bool = True):
@@ -155,32 +188,31 @@ class Int8DynActInt4WeightQATLinear(torch.nn.Linear):
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         # activations: int8 dynamic asymmetric quant
-        if self._fake_quant_enabled:
+        if self._fake_quant_enabled and _can_fuse_choose_qparams_and_fake_quantize_per_token(
+            x, self.scales_precision,
+        ):
+            x_fq = _fused_choose_qparams_and_fake_quantize_per_token(
+                x, self._act_qmin, self._act_qmax,
+            )
+        elif self._fake_quant_enabled:
             (act_scales, act_zp) = _choose_qparams_per_token_asymmetric(
                 x, self.scales_precision, self.zero_points_precision,
             )
-            (act_qmin, act_qmax) = self._get_qmin_qmax(8)
             x_fq = _fake_quantize_per_token(
-                x, act_scales, act_zp, act_qmin, act_qmax,
+                x, act_scales, act_zp, self._act_qmin, self._act_qmax,
             )
         else:
             x_fq = x
 
         # weights: int4 grouped per channel symmetric quant
         if self._fake_quant_enabled:
-            (weight_scales, weight_zp) = get_group_qparams_symmetric(
+            (weight_scales, weight_zp) = _get_group_qparams_symmetric(
                 self.weight, 4, self.groupsize, self.scales_precision,
             )
             # TODO: pass zp dtype to `get_group_qparams_symmetric` instead
             weight_zp = weight_zp.to(self.zero_points_precision)
-            (weight_qmin, weight_qmax) = self._get_qmin_qmax(4)
-            w_fq = _fake_quantize_per_channel_group(
-                self.weight,
-                weight_scales,
-                weight_zp,
-                weight_qmin,
-                weight_qmax,
-                self.groupsize,
+            w_fq = self._weight_fake_quantize_fn(
+                self.weight, weight_scales, weight_zp,
             )
         else:
             w_fq = self.weight
@@ -188,9 +220,7 @@ class Int8DynActInt4WeightQATLinear(torch.nn.Linear):
 
     # TODO: move this to common util
     def _get_qmin_qmax(self, n_bit: int):
-        qmin = -(2 ** (n_bit - 1))
-        qmax = 2 ** (n_bit - 1) - 1
-        return (qmin, qmax)
+        return _QMIN_QMAX_SYM[n_bit]
 
 def enable_8da4w_fake_quant(mod: torch.nn.Module):
     """
@@ -343,7 +373,7 @@ class Int4WeightOnlyQATLinear(torch.nn.Linear):
         n_bit = 4
         qmin = 0
         qmax = 2 ** n_bit - 1
-        scales, zero_points = get_groupwise_affine_qparams(
+        scales, zero_points = _get_groupwise_affine_qparams(
             self.weight, n_bit, self.groupsize, self.scales_precision,
         )
         w_fq = _fake_quantize_per_channel_group(
@@ -355,6 +385,9 @@ class Int4WeightOnlyQATLinear(torch.nn.Linear):
             self.groupsize,
             ZeroPointDomain.FLOAT,
         )
+        # Note: the weight is kept in the `nn.Linear` layout on purpose, the
+        # quantization groups are contiguous along in_features, and `F.linear`
+        # hands the weight to the GEMM as a transposed operand without a copy
         return F.linear(x, w_fq)
 
 def enable_4w_fake_quant(mod: torch.nn.Module):
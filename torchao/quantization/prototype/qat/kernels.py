@@ -0,0 +1,349 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Triton kernels for the QAT fake quantize ops in `utils.py`.
+"""
+
+from typing import Tuple
+
+import torch
+from torch.utils._triton import has_triton
+
+from torchao.utils import TORCH_VERSION_AFTER_2_4
+
+if TORCH_VERSION_AFTER_2_4 and has_triton():
+    from torch._inductor.runtime.triton_helpers import libdevice
+
+# Each program of the per token kernel holds a full token in registers, so
+# larger hidden dims fall back to the unfused ops
+FUSED_PER_TOKEN_MAX_HIDDEN_DIM = 16384
+
+
+if has_triton():
+    import triton
+    import triton.language as tl
+
+    @triton.jit
+    def _round_to_dtype(x, dtype: tl.constexpr):
+        # emulate an op computed in `dtype`, while keeping fp32 for the math
+        return x.to(dtype).to(tl.float32)
+
+    @triton.jit
+    def choose_qparams_and_fake_quantize_per_token_kernel(
+        x_ptr,
+        output_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        n_elements_per_token,
+        quant_min: tl.constexpr,
+        quant_max: tl.constexpr,
+        eps: tl.constexpr,
+        BLOCK_SIZE: tl.constexpr,
+    ):
+        pid = tl.program_id(axis=0)
+        offsets = pid * n_elements_per_token + tl.arange(0, BLOCK_SIZE)
+        mask = tl.arange(0, BLOCK_SIZE) < n_elements_per_token
+        x = tl.load(x_ptr + offsets, mask=mask, other=0.0)
+        x_dtype = x.dtype
+        x = x.to(tl.float32)
+
+        # qparams, matching `_choose_qparams_per_token_asymmetric`, which
+        # computes them in the input dtype
+        min_val = tl.min(tl.where(mask, x, float("inf")), axis=0)
+        max_val = tl.max(tl.where(mask, x, float("-inf")), axis=0)
+        min_val_neg = tl.minimum(min_val, 0.0)
+        max_val_pos = tl.maximum(max_val, 0.0)
+        scale = _round_to_dtype(max_val_pos - min_val_neg, x_dtype)
+        scale = _round_to_dtype(scale / (quant_max - quant_min), x_dtype)
+        scale = _round_to_dtype(tl.maximum(scale, eps), x_dtype)
+        descaled_min = _round_to_dtype(min_val_neg / scale, x_dtype)
+        descaled_max = _round_to_dtype(max_val_pos / scale, x_dtype)
+        zero_point_from_min_error = _round_to_dtype(
+            quant_min + descaled_min, x_dtype
+        )
+        zero_point_from_max_error = _round_to_dtype(
+            quant_max + descaled_max, x_dtype
+        )
+        zero_point_error = _round_to_dtype(
+            zero_point_from_min_error + zero_point_from_max_error, x_dtype
+        )
+        zero_point = tl.where(
+            zero_point_error > 0,
+            _round_to_dtype(quant_min - descaled_min, x_dtype),
+            _round_to_dtype(quant_max - descaled_max, x_dtype),
+        )
+        zero_point = tl.minimum(tl.maximum(zero_point, quant_min), quant_max)
+        zero_point = libdevice.nearbyint(zero_point)
+
+        # fake quantize the token we already hold in registers, matching
+        # `_fake_quantize_per_token`, which computes in fp32
+        q = libdevice.nearbyint(x * (1.0 / scale)) + zero_point
+        q = tl.minimum(tl.maximum(q, quant_min), quant_max)
+        output = ((q - zero_point) * scale).to(x_dtype)
+
+        tl.store(output_ptr + offsets, output, mask=mask)
+        tl.store(scales_ptr + pid, scale)
+        tl.store(zero_points_ptr + pid, zero_point.to(tl.int32))
+
+    @triton.jit
+    def choose_qparams_per_group_kernel(
+        w_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        n_groups,
+        quant_min: tl.constexpr,
+        quant_max: tl.constexpr,
+        mid_point: tl.constexpr,
+        eps: tl.constexpr,
+        symmetric: tl.constexpr,
+        GROUP_SIZE: tl.constexpr,
+        BLOCK_SIZE_G: tl.constexpr,
+    ):
+        pid = tl.program_id(axis=0)
+        offsets_g = pid * BLOCK_SIZE_G + tl.arange(0, BLOCK_SIZE_G)
+        mask_g = offsets_g < n_groups
+        offsets = offsets_g[:, None] * GROUP_SIZE + tl.arange(0, GROUP_SIZE)[None, :]
+        w = tl.load(w_ptr + offsets, mask=mask_g[:, None], other=0.0)
+        w_dtype = w.dtype
+        w = w.to(tl.float32)
+
+        # single pass over each group, matching the numerics of
+        # `choose_qparams_affine`, which computes in the input dtype
+        min_val = tl.min(w, axis=1)
+        max_val = tl.max(w, axis=1)
+        if symmetric:
+            # preserve_zero=True, ZeroPointDomain.INT
+            min_val_neg = tl.minimum(min_val, 0.0)
+            max_val_pos = tl.maximum(max_val, 0.0)
+            max_val_pos = tl.maximum(-min_val_neg, max_val_pos)
+            scale = _round_to_dtype(
+                max_val_pos / ((quant_max - quant_min) / 2), w_dtype
+            )
+            zero_point = tl.zeros([BLOCK_SIZE_G], dtype=tl.float32) + mid_point
+        else:
+            # preserve_zero=False, ZeroPointDomain.FLOAT
+            scale = _round_to_dtype(max_val - min_val, w_dtype)
+            scale = _round_to_dtype(scale / (quant_max - quant_min), w_dtype)
+            zero_point = _round_to_dtype(
+                min_val + _round_to_dtype(scale * mid_point, w_dtype), w_dtype
+            )
+        scale = _round_to_dtype(tl.maximum(scale, eps), w_dtype)
+
+        tl.store(
+            scales_ptr + offsets_g,
+            scale.to(scales_ptr.dtype.element_ty),
+            mask=mask_g,
+        )
+        tl.store(
+            zero_points_ptr + offsets_g,
+            zero_point.to(zero_points_ptr.dtype.element_ty),
+            mask=mask_g,
+        )
+
+    @triton.jit
+    def fake_quantize_per_channel_group_kernel(
+        x_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        output_ptr,
+        n_groups,
+        quant_min: tl.constexpr,
+        quant_max: tl.constexpr,
+        GROUP_SIZE: tl.constexpr,
+        BLOCK_SIZE_G: tl.constexpr,
+    ):
+        pid = tl.program_id(axis=0)
+        offsets_g = pid * BLOCK_SIZE_G + tl.arange(0, BLOCK_SIZE_G)
+        mask_g = offsets_g < n_groups
+        offsets = offsets_g[:, None] * GROUP_SIZE + tl.arange(0, GROUP_SIZE)[None, :]
+        x = tl.load(x_ptr + offsets, mask=mask_g[:, None], other=0.0)
+        scale = tl.load(scales_ptr + offsets_g, mask=mask_g, other=1.0)[:, None]
+        zero_point = tl.load(zero_points_ptr + offsets_g, mask=mask_g, other=0)
+        zero_point = zero_point.to(tl.float32)[:, None]
+
+        # matches `fake_quantize_affine_cachemask` for fp32 inputs and
+        # integer zero points
+        q = libdevice.nearbyint(x * (1.0 / scale)) + zero_point
+        q = tl.minimum(tl.maximum(q, quant_min), quant_max)
+        output = (q - zero_point) * scale
+
+        tl.store(output_ptr + offsets, output, mask=mask_g[:, None])
+
+else:
+
+    def choose_qparams_and_fake_quantize_per_token_kernel(
+        x_ptr,
+        output_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        n_elements_per_token,
+        quant_min,
+        quant_max,
+        eps,
+        BLOCK_SIZE,
+    ):
+        raise AssertionError("unsupported without triton")
+
+    def choose_qparams_per_group_kernel(
+        w_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        n_groups,
+        quant_min,
+        quant_max,
+        mid_point,
+        eps,
+        symmetric,
+        GROUP_SIZE,
+        BLOCK_SIZE_G,
+    ):
+        raise AssertionError("unsupported without triton")
+
+    def fake_quantize_per_channel_group_kernel(
+        x_ptr,
+        scales_ptr,
+        zero_points_ptr,
+        output_ptr,
+        n_groups,
+        quant_min,
+        quant_max,
+        GROUP_SIZE,
+        BLOCK_SIZE_G,
+    ):
+        raise AssertionError("unsupported without triton")
+
+
+def triton_choose_qparams_and_fake_quantize_per_token(
+    x: torch.Tensor,
+    quant_min: int,
+    quant_max: int,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Input: a tensor of activations, fake quantized per token (last dim)
+    Output: the fake quantized tensor, and the fp32 scales and int32 zero
+      points, with the same shapes as `_choose_qparams_per_token_asymmetric`
+
+    This reads the input only once, instead of once to choose the qparams
+    and once to fake quantize.
+    """
+    assert TORCH_VERSION_AFTER_2_4, "unsupported"
+    assert x.is_cuda
+    orig_shape = x.shape
+    n_elements_per_token = orig_shape[-1]
+    assert n_elements_per_token <= FUSED_PER_TOKEN_MAX_HIDDEN_DIM, "unsupported"
+    x = x.reshape(-1, n_elements_per_token).contiguous()
+    n_tokens = x.shape[0]
+    output = torch.empty_like(x)
+    scales = torch.empty(n_tokens, 1, device=x.device, dtype=torch.float32)
+    zero_points = torch.empty(n_tokens, 1, device=x.device, dtype=torch.int32)
+    choose_qparams_and_fake_quantize_per_token_kernel[(n_tokens,)](
+        x,
+        output,
+        scales,
+        zero_points,
+        n_elements_per_token,
+        quant_min=quant_min,
+        quant_max=quant_max,
+        eps=torch.finfo(torch.float32).eps,
+        BLOCK_SIZE=triton.next_power_of_2(n_elements_per_token),
+    )
+    qparams_shape = (*orig_shape[:-1], 1)
+    return (
+        output.reshape(orig_shape),
+        scales.reshape(qparams_shape),
+        zero_points.reshape(qparams_shape),
+    )
+
+
+def triton_choose_qparams_per_group(
+    w: torch.Tensor,
+    group_size: int,
+    quant_min: int,
+    quant_max: int,
+    symmetric: bool,
+    eps: float,
+    dtype: torch.dtype,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Input: a 2d contiguous weight, quantized in groups of `group_size`
+      elements along the last dim
+    Output: scales and zero points in `dtype`, of shape
+      (w.shape[0], w.shape[1] // group_size)
+
+    With `symmetric`, this matches `get_group_qparams_symmetric`, otherwise
+    `get_groupwise_affine_qparams`, but computes the min/max and the qparams
+    of each group in a single pass over the weight. Not differentiable.
+    """
+    assert w.is_cuda and w.is_contiguous() and w.dim() == 2
+    assert w.shape[-1] % group_size == 0
+    assert group_size & (group_size - 1) == 0, "group_size must be a power of 2"
+    qparams_shape = (w.shape[0], w.shape[1] // group_size)
+    n_groups = w.numel() // group_size
+    scales = torch.empty(qparams_shape, device=w.device, dtype=dtype)
+    zero_points = torch.empty(qparams_shape, device=w.device, dtype=dtype)
+    mid_point = (quant_max + quant_min + 1) / 2
+    if symmetric:
+        mid_point = float(int(mid_point))
+    # aim for tiles of ~4096 elements
+    block_size_g = max(1, 4096 // group_size)
+    grid = (triton.cdiv(n_groups, block_size_g),)
+    choose_qparams_per_group_kernel[grid](
+        w,
+        scales,
+        zero_points,
+        n_groups,
+        quant_min=quant_min,
+        quant_max=quant_max,
+        mid_point=mid_point,
+        eps=eps,
+        symmetric=symmetric,
+        GROUP_SIZE=group_size,
+        BLOCK_SIZE_G=block_size_g,
+    )
+    return (scales, zero_points)
+
+
+def triton_fake_quantize_per_channel_group(
+    x: torch.Tensor,
+    scales: torch.Tensor,
+    zero_points: torch.Tensor,
+    quant_min: int,
+    quant_max: int,
+    group_size: int,
+) -> torch.Tensor:
+    """
+    Input: a 2d contiguous fp32 tensor, and its per group fp32 scales and
+      integer zero points
+    Output: the fake quantized tensor, same as the forward of
+      `_fake_quantize_per_channel_group`
+
+    The kernel is compiled once per (group_size, quant_min, quant_max),
+    which are all compile time constants.
+    """
+    assert TORCH_VERSION_AFTER_2_4, "unsupported"
+    assert x.is_cuda and x.is_contiguous() and x.dim() == 2
+    assert x.dtype == torch.float32 and scales.dtype == torch.float32
+    assert x.shape[-1] % group_size == 0
+    assert group_size & (group_size - 1) == 0, "group_size must be a power of 2"
+    n_groups = x.numel() // group_size
+    assert scales.numel() == n_groups and zero_points.numel() == n_groups
+    output = torch.empty_like(x)
+    # aim for tiles of ~4096 elements
+    block_size_g = max(1, 4096 // group_size)
+    grid = (triton.cdiv(n_groups, block_size_g),)
+    fake_quantize_per_channel_group_kernel[grid](
+        x,
+        scales.contiguous(),
+        zero_points.contiguous(),
+        output,
+        n_groups,
+        quant_min=quant_min,
+        quant_max=quant_max,
+        GROUP_SIZE=group_size,
+        BLOCK_SIZE_G=block_size_g,
+    )
+    return output
@@ -4,9 +4,11 @@
 # This source code is licensed under the license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import List, Tuple
+import functools
+from typing import Callable, List, Tuple
 
 import torch
+from torch.utils._triton import has_triton
 
 from torchao.quantization.quant_primitives import (
     fake_quantize_affine_cachemask,
@@ -14,6 +16,15 @@ from torchao.quantization.quant_primitives import (
 )
 from torchao.quantization.utils import (
     _get_per_token_block_size,
+    get_group_qparams_symmetric,
+    get_groupwise_affine_qparams,
+)
+from torchao.utils import TORCH_VERSION_AFTER_2_4
+from .kernels import (
+    FUSED_PER_TOKEN_MAX_HIDDEN_DIM,
+    triton_choose_qparams_and_fake_quantize_per_token,
+    triton_choose_qparams_per_group,
+    triton_fake_quantize_per_channel_group,
 )
 
 
@@ -41,7 +52,8 @@ class _GenericFakeQuantize(torch.autograd.Function):
         # because bf16 * fp32 kernels are not as memory efficient
         assert input.dtype == torch.float32
         assert scales.dtype == torch.float32
-        assert zero_points.dtype == torch.int32
+        # int8 zero points are widened inside the fake quantize math
+        assert zero_points.dtype in (torch.int8, torch.int32)
 
         (fq, mask) = fake_quantize_affine_cachemask(
             input,
@@ -79,6 +91,88 @@ def _fake_quantize_per_channel_group(
         input, scales, zero_points, quant_min, quant_max, block_size, zero_point_domain,
     )
 
+class _TritonFakeQuantizePerChannelGroup(torch.autograd.Function):
+    """
+    Triton version of `_fake_quantize_per_channel_group` for the integer
+    zero point domain, with the same straight-through estimator backward
+    as `_GenericFakeQuantize` (whose mask is computed on the already
+    clamped values).
+    """
+
+    @staticmethod
+    def forward(
+        ctx: torch.autograd.function.FunctionCtx,
+        input: torch.Tensor,
+        scales: torch.Tensor,
+        zero_points: torch.Tensor,
+        quant_min: int,
+        quant_max: int,
+        group_size: int,
+    ) -> torch.Tensor:
+        return triton_fake_quantize_per_channel_group(
+            input, scales, zero_points, quant_min, quant_max, group_size,
+        )
+
+    @staticmethod
+    def backward(ctx, gy):
+        return gy, None, None, None, None, None
+
+def _can_use_triton_fake_quantize_per_channel_group(
+    input: torch.Tensor,
+    scales: torch.Tensor,
+    zero_points: torch.Tensor,
+    group_size: int,
+) -> bool:
+    # same dtype constraints as `_GenericFakeQuantize`
+    return (
+        TORCH_VERSION_AFTER_2_4
+        and input.is_cuda
+        and has_triton()
+        and input.dim() == 2
+        and input.is_contiguous()
+        and input.dtype == torch.float32
+        and scales.dtype == torch.float32
+        and zero_points.dtype in (torch.int8, torch.int32)
+        and input.shape[-1] % group_size == 0
+        and group_size & (group_size - 1) == 0
+    )
+
+def _fake_quantize_per_channel_group_specialized(
+    quant_min: int,
+    quant_max: int,
+    group_size: int,
+    input: torch.Tensor,
+    scales: torch.Tensor,
+    zero_points: torch.Tensor,
+) -> torch.Tensor:
+    if _can_use_triton_fake_quantize_per_channel_group(input, scales, zero_points, group_size):
+        return _TritonFakeQuantizePerChannelGroup.apply(
+            input, scales, zero_points, quant_min, quant_max, group_size,
+        )
+    return _fake_quantize_per_channel_group(
+        input, scales, zero_points, quant_min, quant_max, group_size,
+    )
+
+@functools.lru_cache(maxsize=None)
+def _make_fake_quantize_per_channel_group_fn(
+    quant_min: int,
+    quant_max: int,
+    group_size: int,
+) -> Callable[[torch.Tensor, torch.Tensor, torch.Tensor], torch.Tensor]:
+    """
+    Return `fn(input, scales, zero_points)`, which fake quantizes like
+    `_fake_quantize_per_channel_group` in the integer zero point domain,
+    with the given constant qparams config. For CUDA inputs this runs a
+    triton kernel specialized on these constants. The returned function is
+    picklable, so modules can store it.
+    """
+    return functools.partial(
+        _fake_quantize_per_channel_group_specialized,
+        quant_min,
+        quant_max,
+        group_size,
+    )
+
 def _fake_quantize_per_token(
     input: torch.Tensor,
     scales: torch.Tensor,
@@ -96,6 +190,104 @@ def _fake_quantize_per_token(
     )
     return fq.reshape_as(input).to(input.dtype)
 
+class _FusedChooseQParamsAndFakeQuantizePerToken(torch.autograd.Function):
+    """
+    Fused version of `_choose_qparams_per_token_asymmetric` followed by
+    `_fake_quantize_per_token`, which only reads the input once.
+
+    Backward is the straight-through estimator, same as `_GenericFakeQuantize`
+    (whose mask is computed on the already clamped values).
+    """
+
+    @staticmethod
+    def forward(
+        ctx: torch.autograd.function.FunctionCtx,
+        input: torch.Tensor,
+        quant_min: int,
+        quant_max: int,
+    ) -> torch.Tensor:
+        (fq, _, _) = triton_choose_qparams_and_fake_quantize_per_token(
+            input, quant_min, quant_max,
+        )
+        return fq
+
+    @staticmethod
+    def backward(ctx, gy):
+        return gy, None, None
+
+def _can_fuse_choose_qparams_and_fake_quantize_per_token(
+    input: torch.Tensor,
+    scales_precision: torch.dtype,
+) -> bool:
+    # the fused kernel computes the qparams in fp32, and the unfused path
+    # only supports fp32 scales as well
+    return (
+        TORCH_VERSION_AFTER_2_4
+        and scales_precision == torch.float32
+        and input.is_cuda
+        and has_triton()
+        and input.dtype in (torch.float32, torch.float16, torch.bfloat16)
+        and input.shape[-1] <= FUSED_PER_TOKEN_MAX_HIDDEN_DIM
+    )
+
+def _fused_choose_qparams_and_fake_quantize_per_token(
+    input: torch.Tensor,
+    quant_min: int,
+    quant_max: int,
+) -> torch.Tensor:
+    return _FusedChooseQParamsAndFakeQuantizePerToken.apply(input, quant_min, quant_max)
+
+def _can_use_triton_group_qparams(w: torch.Tensor, group_size: int) -> bool:
+    return (
+        w.is_cuda
+        and has_triton()
+        and w.dim() == 2
+        and w.is_contiguous()
+        and w.dtype in (torch.float32, torch.float16, torch.bfloat16)
+        and group_size > 1
+        and group_size <= w.shape[-1]
+        and w.shape[-1] % group_size == 0
+        and group_size & (group_size - 1) == 0
+    )
+
+def _get_group_qparams_symmetric(
+    w: torch.Tensor,
+    n_bit: int = 4,
+    group_size: int = 128,
+    precision: torch.dtype = torch.float32,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Same as `get_group_qparams_symmetric`, computed in a single pass over
+    CUDA weights. Not differentiable.
+    """
+    if not _can_use_triton_group_qparams(w, group_size):
+        return get_group_qparams_symmetric(w, n_bit, group_size, precision)
+    qmin = -(2 ** (n_bit - 1))
+    qmax = 2 ** (n_bit - 1) - 1
+    eps = torch.finfo(torch.float32).eps
+    return triton_choose_qparams_per_group(
+        w, group_size, qmin, qmax, True, eps, precision,
+    )
+
+def _get_groupwise_affine_qparams(
+    w: torch.Tensor,
+    n_bit: int = 4,
+    group_size: int = 128,
+    dtype: torch.dtype = torch.bfloat16,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Same as `get_groupwise_affine_qparams`, computed in a single pass over
+    CUDA weights. Not differentiable.
+    """
+    if not _can_use_triton_group_qparams(w, group_size):
+        return get_groupwise_affine_qparams(w, n_bit, group_size, dtype)
+    qmin = 0
+    qmax = 2 ** n_bit - 1
+    eps = 1e-6
+    return triton_choose_qparams_per_group(
+        w, group_size, qmin, qmax, False, eps, dtype,
+    )
+
 # TODO: This is copied from torch/ao/quantization/fx/_decomposed.py.
 # The version in pytorch does not have backward support yet so we add
 # it here for now until https://github.com/pytorch/pytorch/pull/123452